@@ -0,0 +1,178 @@
+import os
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import redis.asyncio as redis
+
+from backend.utils import fetch_weather_data, forecast_from_columns, forecast_to_columns, geohash
+from backend.scoring import ScoredDay
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Redis is optional: without REDIS_URL every lookup goes straight to the weather API
+REDIS_URL = os.getenv("REDIS_URL")
+WEATHER_CACHE_TTL = 3600  # Forecasts are cached for one hour
+RECOMMENDATION_CACHE_TTL = 7200  # Outlives one refresh interval so entries don't lapse between runs
+
+redis_client: Optional[redis.Redis] = (
+    redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
+)
+
+def cache_enabled() -> bool:
+    """Whether a Redis cache is configured"""
+    return redis_client is not None
+
+def weather_cache_key(lat: float, lon: float) -> str:
+    """Cache key for the forecast of the ~150m cell containing the coordinates"""
+    return f"weather:{geohash(lat, lon, 7)}"
+
+async def get_cached_weather(lat: float, lon: float) -> Optional[np.ndarray]:
+    """
+    Get a cached forecast for the given location
+
+    Returns:
+        Forecast array of daily weather data, or None on a cache miss
+    """
+    if redis_client is None:
+        return None
+
+    try:
+        cached = await redis_client.get(weather_cache_key(lat, lon))
+    except Exception as e:
+        logger.error(f"Error reading weather cache: {e}")
+        return None
+
+    if not cached:
+        return None
+
+    try:
+        return forecast_from_columns(json.loads(cached))
+    except (TypeError, KeyError, ValueError) as e:
+        # Entries written in an older format are treated as a miss and rewritten
+        logger.warning(f"Ignoring unreadable cached forecast: {e}")
+        return None
+
+async def cache_weather(lat: float, lon: float, weather_data: np.ndarray) -> None:
+    """Store a forecast for the given location"""
+    if redis_client is None or len(weather_data) == 0:
+        return
+
+    try:
+        await redis_client.set(
+            weather_cache_key(lat, lon),
+            json.dumps(forecast_to_columns(weather_data)),
+            ex=WEATHER_CACHE_TTL
+        )
+    except Exception as e:
+        logger.error(f"Error writing weather cache: {e}")
+
+async def get_weather(lat: float, lon: float) -> np.ndarray:
+    """
+    Get the forecast for a location, fetching it from the weather API on a cache miss
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+
+    Returns:
+        Forecast array of daily weather data (empty if the forecast is unavailable)
+    """
+    weather_data = await get_cached_weather(lat, lon)
+    if weather_data is not None:
+        return weather_data
+
+    weather_data = await fetch_weather_data(lat, lon)
+    await cache_weather(lat, lon, weather_data)
+    return weather_data
+
+async def prefetch_weather(lat: float, lon: float) -> None:
+    """Warm the forecast caches for a location, e.g. while a user signs up"""
+    await get_weather(lat, lon)
+
+def recommendation_cache_key(
+    lat: float,
+    lon: float,
+    age_range: str,
+    activity_category: str,
+    user_preferences: Dict
+) -> str:
+    """
+    Cache key for recommendations shared by everyone with the same location cell,
+    age range, activity category and weather preferences on the current day
+    """
+    preferences = ":".join(
+        str(user_preferences.get(key))
+        for key in ("min_temperature", "max_temperature", "avoid_rain", "avoid_snow")
+    )
+    today = datetime.utcnow().date().isoformat()
+    return f"rec:{geohash(lat, lon, 7)}:{activity_category}:{age_range}:{preferences}:{today}"
+
+async def get_cached_recommendations(key: str) -> Optional[List[ScoredDay]]:
+    """
+    Get cached recommendations
+
+    Returns:
+        List of recommended days, or None on a cache miss
+    """
+    if redis_client is None:
+        return None
+
+    try:
+        cached = await redis_client.get(key)
+    except Exception as e:
+        logger.error(f"Error reading recommendation cache: {e}")
+        return None
+
+    if not cached:
+        return None
+
+    try:
+        return [
+            ScoredDay(**{**rec, "date": datetime.fromisoformat(rec["date"])})
+            for rec in json.loads(cached)
+        ]
+    except (TypeError, KeyError, ValueError) as e:
+        # Entries written in an older format are treated as a miss and rewritten
+        logger.warning(f"Ignoring unreadable cached recommendations: {e}")
+        return None
+
+async def cache_recommendations(key: str, recommendations: List[ScoredDay]) -> None:
+    """Store recommendations under the given key"""
+    if redis_client is None or not recommendations:
+        return
+
+    try:
+        await redis_client.set(
+            key,
+            json.dumps([{**asdict(rec), "date": rec.date.isoformat()} for rec in recommendations]),
+            ex=RECOMMENDATION_CACHE_TTL
+        )
+    except Exception as e:
+        logger.error(f"Error writing recommendation cache: {e}")
+
+async def acquire_lock(name: str, ttl: int) -> bool:
+    """
+    Take a short-lived lock shared by all workers
+
+    Returns:
+        True if this caller holds the lock for the next ttl seconds
+    """
+    if redis_client is None:
+        return False
+
+    try:
+        return bool(await redis_client.set(name, "1", nx=True, ex=ttl))
+    except Exception as e:
+        logger.error(f"Error acquiring lock {name}: {e}")
+        return False
+
+async def close_cache() -> None:
+    """Close the Redis connection pool"""
+    if redis_client is not None:
+        await redis_client.aclose()
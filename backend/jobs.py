@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models import User, Activity, UserActivity
+from backend.scoring import get_top_recommendations_batch
+from backend.cache import get_weather, cache_recommendations, recommendation_cache_key, acquire_lock
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_REFRESH_INTERVAL = 3600  # Recompute cached recommendations every hour
+
+async def refresh_recommendations(db: AsyncSession) -> int:
+    """
+    Precompute and cache recommendations for every activity users have selected
+
+    Users sharing a location cell, age range, activity category and weather
+    preferences share one cache entry, so each combination is scored once.
+
+    Returns:
+        Number of cache entries refreshed
+    """
+    rows = (await db.execute(
+        select(
+            User.location_lat,
+            User.location_lon,
+            User.age_range,
+            Activity.category,
+            UserActivity.min_temperature,
+            UserActivity.max_temperature,
+            UserActivity.avoid_rain,
+            UserActivity.avoid_snow
+        )
+        .join(UserActivity, UserActivity.user_id == User.id)
+        .join(Activity, UserActivity.activity_id == Activity.id)
+        .distinct()
+    )).all()
+
+    # Group the distinct cache entries by location so each forecast is scored once for all of them
+    profiles_by_location: Dict[Tuple[float, float], Dict[str, Tuple]] = {}
+    seen_keys = set()
+    for lat, lon, age_range, category, min_temperature, max_temperature, avoid_rain, avoid_snow in rows:
+        user_preferences = {
+            "min_temperature": min_temperature,
+            "max_temperature": max_temperature,
+            "avoid_rain": avoid_rain,
+            "avoid_snow": avoid_snow
+        }
+        key = recommendation_cache_key(lat, lon, age_range, category, user_preferences)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        profiles_by_location.setdefault((lat, lon), {})[key] = (age_range, category, user_preferences)
+
+    refreshed = 0
+    for (lat, lon), profiles in profiles_by_location.items():
+        weather_data = await get_weather(lat, lon)
+        if len(weather_data) == 0:
+            continue
+
+        recommendation_sets = get_top_recommendations_batch(
+            weather_data=weather_data,
+            users=list(profiles.values()),
+            top_n=3
+        )
+        for key, recommendations in zip(profiles, recommendation_sets):
+            await cache_recommendations(key, recommendations)
+        refreshed += len(profiles)
+
+    return refreshed
+
+async def run_recommendation_refresh(
+    session_factory: async_sessionmaker,
+    interval: int = RECOMMENDATION_REFRESH_INTERVAL
+) -> None:
+    """
+    Refresh cached recommendations every interval seconds until cancelled
+
+    Every worker runs this loop; a shared lock makes sure only one of them
+    does the work in each interval.
+    """
+    while True:
+        try:
+            if await acquire_lock("lock:refresh-recommendations", max(interval - 60, 1)):
+                async with session_factory() as db:
+                    refreshed = await refresh_recommendations(db)
+                logger.info(f"Refreshed {refreshed} cached recommendation sets")
+        except Exception as e:
+            logger.error(f"Error refreshing recommendations: {e}")
+
+        await asyncio.sleep(interval)
@@ -1,248 +1,117 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from typing import List, Optional, Dict
-from pydantic import BaseModel, EmailStr, Field
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from typing import List, Literal, Optional, Dict, Set, Tuple
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 
 import os
+import asyncio
 import logging
 from datetime import datetime, timedelta
 import json
 
 # Import local modules with correct relative imports
-from backend.models import Base, User, Activity, UserActivity, Recommendation, Message
-from backend.utils import fetch_weather_data, get_location_name, generate_ics_file, generate_invite_email, filter_activities_by_demographics
+from backend.models import User, Activity, UserActivity, Recommendation, Message
+from backend.utils import (
+    get_location_name, generate_ics_file, generate_invite_email, parse_age_range, query_activities,
+    close_http_client
+)
 from backend.scoring import get_top_recommendations
+from backend.cache import (
+    cache_enabled, get_weather, prefetch_weather, close_cache,
+    recommendation_cache_key, get_cached_recommendations, cache_recommendations
+)
+from backend.jobs import run_recommendation_refresh
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db.sqlite3")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create all tables
-Base.metadata.create_all(bind=engine)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./db.sqlite3")
+if DATABASE_URL.startswith("sqlite"):
+    # An in-memory database lives on a single connection; a file database keeps a
+    # few connections open instead of reopening the file on every request
+    from sqlalchemy.dialects.sqlite import insert as upsert
+    engine = create_async_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if ":memory:" in DATABASE_URL else AsyncAdaptedQueuePool,
+    )
+else:
+    # Keep warm connections around and drop stale ones before handing them out
+    from sqlalchemy.dialects.postgresql import insert as upsert
+    engine = create_async_engine(
+        DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_pre_ping=True,
+        echo=False,
+    )
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Initialize FastAPI app
 app = FastAPI(title="The Next Good Day API", 
               description="Find the best days for your activities based on weather and availability",
-              version="0.1.0")
+              version="0.1.0",
+              default_response_class=ORJSONResponse)
+
+# Add CORS middleware for the origins allowed to call the API from another domain
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:8000").split(",")
+    if origin.strip()
+]
 
-# Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # For development - restrict in production
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["Content-Disposition"],  # Lets the frontend read calendar file names
+    max_age=86400,  # Browsers may cache preflight responses for a day
 )
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
-# Load initial activities data
-def load_initial_activities():
-    db = SessionLocal()
-    # Check if activities already exist
-    if db.query(Activity).count() == 0:
-        logger.info("Loading initial activities...")
-        
-        activities = [
-            {
-                "name": "Hiking",
-                "description": "Explore nature trails and enjoy the outdoors",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 50,
-                    "max_temperature": 85,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Photography",
-                "description": "Capture beautiful moments and scenes",
-                "category": "creative",
-                "weather_preferences": {
-                    "min_temperature": 45,
-                    "max_temperature": 90,
-                    "avoid_rain": False,
-                    "avoid_snow": False
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Cycling",
-                "description": "Go for a bike ride",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 55,
-                    "max_temperature": 85,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Picnic",
-                "description": "Enjoy a meal outdoors",
-                "category": "social",
-                "weather_preferences": {
-                    "min_temperature": 65,
-                    "max_temperature": 85,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Painting",
-                "description": "Express yourself through art",
-                "category": "creative",
-                "weather_preferences": {
-                    "min_temperature": 50,
-                    "max_temperature": 90,
-                    "avoid_rain": False,
-                    "avoid_snow": False
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Reading",
-                "description": "Enjoy a good book",
-                "category": "creative",
-                "weather_preferences": {
-                    "min_temperature": 50,
-                    "max_temperature": 90,
-                    "avoid_rain": False,
-                    "avoid_snow": False
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Running",
-                "description": "Go for a jog or run",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 45,
-                    "max_temperature": 80,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Beach Day",
-                "description": "Relax by the water",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 75,
-                    "max_temperature": 95,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Coffee Shop Work",
-                "description": "Productive time at a local coffee shop",
-                "category": "creative",
-                "weather_preferences": {
-                    "min_temperature": 40,
-                    "max_temperature": 100,
-                    "avoid_rain": False,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Gardening",
-                "description": "Tend to plants and garden",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 55,
-                    "max_temperature": 85,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            },
-            {
-                "name": "Yoga",
-                "description": "Practice yoga outdoors",
-                "category": "outdoor",
-                "weather_preferences": {
-                    "min_temperature": 60,
-                    "max_temperature": 85,
-                    "avoid_rain": True,
-                    "avoid_snow": True
-                },
-                "min_age": None,
-                "max_age": None,
-                "gender_preference": None
-            }
-        ]
-        
-        # Add activities to database
-        for activity_data in activities:
-            activity = Activity(
-                name=activity_data["name"],
-                description=activity_data["description"],
-                category=activity_data["category"],
-                weather_preferences=activity_data["weather_preferences"],
-                min_age=activity_data["min_age"],
-                max_age=activity_data["max_age"],
-                gender_preference=activity_data["gender_preference"]
-            )
-            db.add(activity)
-        
-        db.commit()
-        logger.info(f"Added {len(activities)} initial activities")
-    
-    db.close()
 
-# Load initial activities on startup
+# Forecast warm-ups started at sign-up, referenced until they finish so they aren't garbage collected
+prefetch_tasks: Set[asyncio.Task] = set()
+
+# Start background work on startup (the schema and activity catalog are managed by Alembic)
 @app.on_event("startup")
-def startup_event():
-    load_initial_activities()
+async def startup_event():
+    # Keep cached recommendations fresh in the background
+    app.state.refresh_task = (
+        asyncio.create_task(run_recommendation_refresh(SessionLocal)) if cache_enabled() else None
+    )
+
+# Stop background work and close pooled database, cache and upstream API connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.refresh_task is not None:
+        app.state.refresh_task.cancel()
+    for task in prefetch_tasks:
+        task.cancel()
+    await engine.dispose()
+    await close_cache()
+    await close_http_client()
+
+# Age ranges offered at sign-up
+AgeRange = Literal["18-24", "25-34", "35-44", "45-54", "55+"]
 
 # Pydantic models for API requests and responses
 class UserCreate(BaseModel):
     email: EmailStr
-    age_range: str
+    age_range: AgeRange
     gender: Optional[str] = None
     location_lat: float
     location_lon: float
@@ -268,8 +137,8 @@ class ActivityResponse(BaseModel):
 
 class UserActivityCreate(BaseModel):
     activity_id: int
-    preferred_time_start: Optional[int] = None
-    preferred_time_end: Optional[int] = None
+    preferred_time_start: Optional[int] = Field(None, ge=0, le=23)  # Hour of day
+    preferred_time_end: Optional[int] = Field(None, ge=0, le=23)  # Hour of day
     preferred_days: Optional[str] = None
     min_temperature: Optional[float] = None
     max_temperature: Optional[float] = None
@@ -301,98 +170,100 @@ class InviteEmailResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# Validators/serializers for the list endpoints, built once instead of per request
+ACTIVITY_LIST_ADAPTER = TypeAdapter(List[ActivityResponse])
+RECOMMENDATION_LIST_ADAPTER = TypeAdapter(List[RecommendationResponse])
+
+def json_list_response(adapter: TypeAdapter, items: list) -> Response:
+    """Validate ORM objects or dicts and serialize them straight to JSON bytes"""
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(items, from_attributes=True)),
+        media_type="application/json"
+    )
+
 # API Endpoints
 @app.post("/api/users", response_model=UserResponse)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new user profile"""
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    # Check if user already exists, so returning users never trigger a geocoder call
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         return existing_user
     
-    # Get location name
+    # Warm the forecast cache alongside the location lookup without holding up the response,
+    # so the first activity lookup doesn't wait on the weather API
+    prefetch_task = asyncio.create_task(prefetch_weather(user_data.location_lat, user_data.location_lon))
+    prefetch_tasks.add(prefetch_task)
+    prefetch_task.add_done_callback(prefetch_tasks.discard)
+    
     location_name = await get_location_name(user_data.location_lat, user_data.location_lon)
     
-    # Create new user
-    new_user = User(
-        email=user_data.email,
-        age_range=user_data.age_range,
-        gender=user_data.gender,
-        location_lat=user_data.location_lat,
-        location_lon=user_data.location_lon,
-        location_name=location_name
+    # Create the complete user row in one statement unless a concurrent request registered
+    # the email first; no row comes back on conflict
+    new_user = await db.scalar(
+        upsert(User)
+        .values(
+            email=user_data.email,
+            age_range=user_data.age_range,
+            gender=user_data.gender,
+            location_lat=user_data.location_lat,
+            location_lon=user_data.location_lon,
+            location_name=location_name
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User)
     )
+    await db.commit()
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    if new_user is None:
+        return await db.scalar(select(User).where(User.email == user_data.email))
     
     return new_user
 
 @app.get("/api/users/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user profile by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @app.get("/api/activities", response_model=List[ActivityResponse])
-def get_activities(
-    age_range: Optional[str] = None,
+async def get_activities(
+    age_range: Optional[AgeRange] = None,
     gender: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all activities or filter by demographics"""
-    activities = db.query(Activity).all()
-    
     # Filter activities if demographic info provided
     if age_range:
-        activities_data = [
-            {
-                "id": a.id,
-                "name": a.name,
-                "description": a.description,
-                "category": a.category,
-                "min_age": a.min_age,
-                "max_age": a.max_age,
-                "gender_preference": a.gender_preference
-            }
-            for a in activities
-        ]
-        
-        filtered_activities_data = filter_activities_by_demographics(
-            activities_data, age_range, gender
-        )
-        
-        # Get IDs of filtered activities
-        filtered_ids = [a["id"] for a in filtered_activities_data]
-        
-        # Return filtered activities
-        return [a for a in activities if a.id in filtered_ids]
+        min_user_age, max_user_age = parse_age_range(age_range)
+        activities = await query_activities(db, min_user_age, max_user_age, gender)
+    else:
+        activities = (await db.scalars(select(Activity))).all()
     
-    return activities
+    return json_list_response(ACTIVITY_LIST_ADAPTER, activities)
 
 @app.post("/api/users/{user_id}/activities", response_model=dict)
 async def add_user_activity(
     user_id: str,
     activity_data: UserActivityCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add an activity to a user's profile and get recommendations"""
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if activity exists
-    activity = db.query(Activity).filter(Activity.id == activity_data.activity_id).first()
+    activity = await db.get(Activity, activity_data.activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
@@ -410,17 +281,8 @@ async def add_user_activity(
     )
     
     db.add(user_activity)
-    db.commit()
-    db.refresh(user_activity)
-    
-    # Fetch weather data for user's location
-    weather_data = await fetch_weather_data(user.location_lat, user.location_lon)
-    
-    if not weather_data:
-        return {
-            "user_activity_id": user_activity.id,
-            "recommendations": []
-        }
+    await db.commit()
+    await db.refresh(user_activity)
     
     # Get user preferences from the user activity
     user_preferences = {
@@ -430,48 +292,67 @@ async def add_user_activity(
         "avoid_snow": user_activity.avoid_snow
     }
     
-    # Get top recommendations
-    recommendations = get_top_recommendations(
-        weather_data=weather_data,
-        user_age_range=user.age_range,
-        activity_category=activity.category,
-        user_preferences=user_preferences,
-        top_n=3
+    # Use precomputed recommendations when available, scoring inline on a cold cache
+    cache_key = recommendation_cache_key(
+        user.location_lat, user.location_lon, user.age_range, activity.category, user_preferences
     )
+    recommendations = await get_cached_recommendations(cache_key)
     
-    # Store recommendations in database
-    db_recommendations = []
-    for rec in recommendations:
-        new_rec = Recommendation(
-            user_activity_id=user_activity.id,
-            date=rec["date"],
-            score=rec["score"],
-            explanation=rec["explanation"],
-            weather_summary=rec["weather_summary"],
-            temperature=rec["temperature"],
-            precipitation_probability=rec.get("precipitation_probability", 0),
-            wind_speed=rec.get("wind_speed", 0)
+    if recommendations is None:
+        # Fetch weather data for user's location
+        weather_data = await get_weather(user.location_lat, user.location_lon)
+        
+        if len(weather_data) == 0:
+            return {
+                "user_activity_id": user_activity.id,
+                "recommendations": []
+            }
+        
+        # Get top recommendations
+        recommendations = get_top_recommendations(
+            weather_data=weather_data,
+            user_age_range=user.age_range,
+            activity_category=activity.category,
+            user_preferences=user_preferences,
+            top_n=3
         )
-        db.add(new_rec)
-        db_recommendations.append(new_rec)
-    
-    db.commit()
-    for rec in db_recommendations:
-        db.refresh(rec)
+        await cache_recommendations(cache_key, recommendations)
+    
+    # Store recommendations in database; ids come back from the INSERT itself
+    recommendation_ids = []
+    if recommendations:
+        result = await db.execute(
+            insert(Recommendation).returning(Recommendation.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_activity_id": user_activity.id,
+                    "date": rec.date,
+                    "score": rec.score,
+                    "explanation": rec.explanation,
+                    "weather_summary": rec.weather_summary,
+                    "temperature": rec.temperature,
+                    "precipitation_probability": rec.precipitation_probability,
+                    "wind_speed": rec.wind_speed
+                }
+                for rec in recommendations
+            ]
+        )
+        recommendation_ids = result.scalars().all()
+        await db.commit()
     
     # Format response
     response_recommendations = [
         {
-            "id": rec.id,
+            "id": rec_id,
             "date": rec.date,
             "score": rec.score,
             "explanation": rec.explanation,
             "weather_summary": rec.weather_summary,
             "temperature": rec.temperature,
-            "preferred_time_start": recommendations[i].get("preferred_time_start"),
-            "preferred_time_end": recommendations[i].get("preferred_time_end")
+            "preferred_time_start": rec.preferred_time_start,
+            "preferred_time_end": rec.preferred_time_end
         }
-        for i, rec in enumerate(db_recommendations)
+        for rec_id, rec in zip(recommendation_ids, recommendations)
     ]
     
     return {
@@ -483,86 +364,100 @@ async def add_user_activity(
 async def get_user_recommendations(
     user_id: str,
     activity_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all recommendations for a user, optionally filtered by activity"""
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Query to get all user activities
-    query = db.query(UserActivity).filter(UserActivity.user_id == user_id)
+    # Load recommendations together with their user activity and activity in one query
+    query = (
+        select(Recommendation, UserActivity, Activity)
+        .join(UserActivity, Recommendation.user_activity_id == UserActivity.id)
+        .outerjoin(Activity, UserActivity.activity_id == Activity.id)
+        .where(UserActivity.user_id == user_id)
+        .order_by(Recommendation.score.desc(), Recommendation.id)  # Highest score first
+    )
     
     # Filter by activity if specified
     if activity_id:
-        query = query.filter(UserActivity.activity_id == activity_id)
+        query = query.where(UserActivity.activity_id == activity_id)
     
-    user_activities = query.all()
+    rows = (await db.execute(query)).all()
     
-    # Get recommendations for all user activities
-    recommendations = []
-    for ua in user_activities:
-        ua_recommendations = db.query(Recommendation).filter(
-            Recommendation.user_activity_id == ua.id
-        ).all()
-        
-        for rec in ua_recommendations:
-            # Get the activity for this recommendation
-            activity = db.query(Activity).filter(Activity.id == ua.activity_id).first()
-            
-            # Add to response
-            recommendations.append({
-                "id": rec.id,
-                "date": rec.date,
-                "score": rec.score,
-                "explanation": rec.explanation,
-                "weather_summary": rec.weather_summary,
-                "temperature": rec.temperature,
-                "preferred_time_start": ua.preferred_time_start,
-                "preferred_time_end": ua.preferred_time_end,
-                "activity_name": activity.name if activity else "Unknown Activity"
-            })
-    
-    # Sort by score (highest first)
-    recommendations.sort(key=lambda x: x["score"], reverse=True)
-    
-    return recommendations
+    return json_list_response(RECOMMENDATION_LIST_ADAPTER, [
+        {
+            "id": rec.id,
+            "date": rec.date,
+            "score": rec.score,
+            "explanation": rec.explanation,
+            "weather_summary": rec.weather_summary,
+            "temperature": rec.temperature,
+            "preferred_time_start": ua.preferred_time_start,
+            "preferred_time_end": ua.preferred_time_end,
+            "activity_name": activity.name if activity else "Unknown Activity"
+        }
+        for rec, ua, activity in rows
+    ])
+
+async def get_recommendation_details(db: AsyncSession, recommendation_id: int):
+    """
+    Load a recommendation together with its user activity, user and activity in one query
+    
+    Returns:
+        Row of (recommendation, user_activity, user, activity), or None if the
+        recommendation doesn't exist. Missing related rows come back as None.
+    """
+    result = await db.execute(
+        select(Recommendation, UserActivity, User, Activity)
+        .outerjoin(UserActivity, Recommendation.user_activity_id == UserActivity.id)
+        .outerjoin(User, UserActivity.user_id == User.id)
+        .outerjoin(Activity, UserActivity.activity_id == Activity.id)
+        .where(Recommendation.id == recommendation_id)
+    )
+    return result.one_or_none()
+
+def preferred_time_window(user_activity: UserActivity) -> Tuple[int, int]:
+    """
+    Get the hours an activity is planned for, defaulting to noon to 6pm
+    
+    Returns:
+        Tuple of (start hour, end hour); midnight (0) is a valid choice, not a missing one
+    """
+    time_start = 12 if user_activity.preferred_time_start is None else user_activity.preferred_time_start
+    time_end = 18 if user_activity.preferred_time_end is None else user_activity.preferred_time_end
+    return time_start, time_end
 
 @app.post("/api/recommendations/{recommendation_id}/invite", response_model=InviteEmailResponse)
 async def create_invite_email(
     recommendation_id: int,
     invite_data: InviteEmailRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create an invitation email for a recommendation (stored, not sent)"""
-    # Get the recommendation
-    recommendation = db.query(Recommendation).filter(Recommendation.id == recommendation_id).first()
-    if not recommendation:
+    # Get the recommendation with its user activity, user and activity
+    row = await get_recommendation_details(db, recommendation_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Recommendation not found")
     
-    # Get the user activity
-    user_activity = db.query(UserActivity).filter(
-        UserActivity.id == recommendation.user_activity_id
-    ).first()
+    recommendation, user_activity, user, activity = row
     
     if not user_activity:
         raise HTTPException(status_code=404, detail="User activity not found")
     
-    # Get the user and activity
-    user = db.query(User).filter(User.id == user_activity.user_id).first()
-    activity = db.query(Activity).filter(Activity.id == user_activity.activity_id).first()
-    
     if not user or not activity:
         raise HTTPException(status_code=404, detail="User or activity not found")
     
     # Format recommendation data for email generation
+    time_start, time_end = preferred_time_window(user_activity)
     rec_data = {
         "date": recommendation.date,
         "score": recommendation.score,
         "weather_summary": recommendation.weather_summary,
-        "preferred_time_start": user_activity.preferred_time_start or 12,
-        "preferred_time_end": user_activity.preferred_time_end or 18
+        "preferred_time_start": time_start,
+        "preferred_time_end": time_end
     }
     
     # Generate email content
@@ -584,56 +479,53 @@ async def create_invite_email(
     )
     
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    await db.commit()
+    await db.refresh(message)
     
     return message
 
-@app.get("/api/recommendations/{recommendation_id}/calendar", response_model=dict)
+@app.get("/api/recommendations/{recommendation_id}/calendar", response_class=Response)
 async def get_calendar_file(
     recommendation_id: int,
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """Generate an ICS file for a recommendation"""
-    # Get the recommendation
-    recommendation = db.query(Recommendation).filter(Recommendation.id == recommendation_id).first()
-    if not recommendation:
+    # Get the recommendation with its user activity, user and activity
+    row = await get_recommendation_details(db, recommendation_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Recommendation not found")
     
-    # Get the user activity
-    user_activity = db.query(UserActivity).filter(
-        UserActivity.id == recommendation.user_activity_id
-    ).first()
+    recommendation, user_activity, user, activity = row
     
     if not user_activity:
         raise HTTPException(status_code=404, detail="User activity not found")
     
-    # Get the activity and user
-    activity = db.query(Activity).filter(Activity.id == user_activity.activity_id).first()
-    user = db.query(User).filter(User.id == user_activity.user_id).first()
-    
     if not activity or not user:
         raise HTTPException(status_code=404, detail="Activity or user not found")
     
-    # Default time window if not specified
-    time_start = user_activity.preferred_time_start or 12  # Default to noon
-    time_end = user_activity.preferred_time_end or 18      # Default to 6pm
+    time_start, time_end = preferred_time_window(user_activity)
     
     # Generate ICS content
-    ics_content = generate_ics_file(
+    ics_bytes = generate_ics_file(
         activity_name=activity.name,
         date=recommendation.date,
         time_start=time_start,
         time_end=time_end,
         location=user.location_name or "Your Location",
         description=f"Weather: {recommendation.weather_summary}\n{recommendation.explanation}"
+    ).encode("utf-8")
+    
+    # Return the ICS file itself as a download
+    filename = f"{activity.name.lower().replace(' ', '_')}_{recommendation.date.strftime('%Y-%m-%d')}.ics"
+    return Response(
+        content=ics_bytes,
+        media_type="text/calendar",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
-    
-    # Return ICS content and filename
-    return {
-        "ics_content": ics_content,
-        "filename": f"{activity.name.lower().replace(' ', '_')}_{recommendation.date.strftime('%Y-%m-%d')}.ics"
-    }
 
-# Serve frontend static files
-app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
+# Serve the frontend page and its assets outside the API path space
+@app.get("/", response_class=FileResponse, include_in_schema=False)
+async def index():
+    return FileResponse("frontend/index.html")
+
+app.mount("/static", StaticFiles(directory="frontend"), name="frontend")
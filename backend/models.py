@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
+# Relationships never load implicitly: an async session can't lazy load, and a loop over
+# user.activities would issue one query per row. Queries join related tables or request
+# them with selectinload()/joinedload(), and any other access raises right away.
 Base = declarative_base()
 
 def generate_uuid():
@@ -25,15 +28,18 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    activities = relationship("UserActivity", back_populates="user", cascade="all, delete-orphan")
-    messages = relationship("Message", back_populates="user", cascade="all, delete-orphan")
+    activities = relationship("UserActivity", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    messages = relationship("Message", back_populates="user", cascade="all, delete-orphan", lazy="raise")
 
 class Activity(Base):
     """Pre-defined activities that users can select"""
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_act_demo", "min_age", "max_age", "gender_preference"),
+    )
     
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
+    name = Column(String, unique=True, nullable=False, index=True)
     description = Column(Text, nullable=True)
     category = Column(String, nullable=False)  # e.g., "outdoor", "creative", "social"
     weather_preferences = Column(JSON, nullable=True)  # JSON for ideal weather conditions
@@ -44,11 +50,15 @@ class Activity(Base):
     gender_preference = Column(String, nullable=True)  # null means all genders
     
     # Relationships
-    user_activities = relationship("UserActivity", back_populates="activity")
+    user_activities = relationship("UserActivity", back_populates="activity", lazy="raise")
 
 class UserActivity(Base):
     """Junction table between users and their selected activities with preferences"""
     __tablename__ = "user_activities"
+    __table_args__ = (
+        # Serves lookups by user_id alone as well as by (user_id, activity_id)
+        Index("ix_ua_user_activity", "user_id", "activity_id"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -65,13 +75,17 @@ class UserActivity(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="activities")
-    activity = relationship("Activity", back_populates="user_activities")
-    recommendations = relationship("Recommendation", back_populates="user_activity", cascade="all, delete-orphan")
+    user = relationship("User", back_populates="activities", lazy="raise")
+    activity = relationship("Activity", back_populates="user_activities", lazy="raise")
+    recommendations = relationship("Recommendation", back_populates="user_activity", cascade="all, delete-orphan", lazy="raise")
 
 class Recommendation(Base):
     """Recommended days for user activities"""
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # Serves lookups by user_activity_id alone as well as ordered by date
+        Index("ix_recs_ua_date", "user_activity_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_activity_id = Column(Integer, ForeignKey("user_activities.id"), nullable=False)
@@ -85,11 +99,14 @@ class Recommendation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    user_activity = relationship("UserActivity", back_populates="recommendations")
+    user_activity = relationship("UserActivity", back_populates="recommendations", lazy="raise")
 
 class Message(Base):
     """Stored email messages for invitations (not sent in MVP)"""
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_msg_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -100,4 +117,4 @@ class Message(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="messages")
+    user = relationship("User", back_populates="messages", lazy="raise")
@@ -1,8 +1,16 @@
 import datetime
-from typing import Dict, List, Tuple, Optional
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Dict, List, Optional, Sequence, Tuple
 import json
 import logging
 
+import numpy as np
+from numba import njit
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,100 +39,185 @@ AGE_GROUP_PREFERENCES = {
     }
 }
 
-# Default activity preferences
-ACTIVITY_DEFAULTS = {
-    "outdoor": {
+# Default activity preferences (read-only, so per-user overrides can't leak between calls)
+ACTIVITY_DEFAULTS = MappingProxyType({
+    "outdoor": MappingProxyType({
         "min_temperature": 60,  # °F
         "max_temperature": 85,  # °F
         "avoid_rain": True,
         "avoid_snow": True,
-    },
-    "creative": {
+    }),
+    "creative": MappingProxyType({
         "min_temperature": 50,  # °F - indoor activities can be comfortable at lower temps
         "max_temperature": 90,  # °F
         "avoid_rain": False,    # Doesn't matter for indoor activities
         "avoid_snow": False,    # Doesn't matter for indoor activities
-    },
-    "social": {
+    }),
+    "social": MappingProxyType({
         "min_temperature": 55,  # °F
         "max_temperature": 90,  # °F
         "avoid_rain": True,     # Assuming some activities might be outdoors
         "avoid_snow": True,
-    }
-}
+    })
+})
+
+@dataclass
+class ScoredDay:
+    """A forecast day scored for one user's activity"""
+    __slots__ = (
+        "date", "score", "explanation", "weather_summary", "temperature",
+        "precipitation_probability", "wind_speed", "preferred_time_start", "preferred_time_end"
+    )
+    
+    date: datetime.datetime
+    score: float
+    explanation: str
+    weather_summary: str
+    temperature: float
+    precipitation_probability: float
+    wind_speed: float
+    preferred_time_start: int
+    preferred_time_end: int
 
 def is_weekend(date: datetime.datetime) -> bool:
     """Check if the given date is a weekend (Saturday or Sunday)"""
     return date.weekday() >= 5  # 5=Saturday, 6=Sunday
 
+# Default time windows keyed by (age_range, is_weekend), flattened once at import
+_TIME_WINDOW = {
+    (age_range, weekend): hours["weekend_hours" if weekend else "weekday_hours"]
+    for age_range, hours in AGE_GROUP_PREFERENCES.items()
+    for weekend in (True, False)
+}
+
 def get_default_time_window(age_range: str, date: datetime.datetime) -> Tuple[int, int]:
     """Get default time window based on age range and whether it's a weekend"""
-    if age_range not in AGE_GROUP_PREFERENCES:
-        # Default to mid-range if age not specified
-        age_range = "25-34"
+    weekend = date.weekday() >= 5  # 5=Saturday, 6=Sunday
     
-    if is_weekend(date):
-        return AGE_GROUP_PREFERENCES[age_range]["weekend_hours"]
-    else:
-        return AGE_GROUP_PREFERENCES[age_range]["weekday_hours"]
+    # Default to mid-range if age not specified
+    return _TIME_WINDOW.get((age_range, weekend)) or _TIME_WINDOW[("25-34", weekend)]
 
-def calculate_weather_score(
+# Explanation categories reported by the scoring kernel
+TEMP_IDEAL, TEMP_COOL, TEMP_WARM = 0, 1, 2
+RAIN_NONE, RAIN_SOME, RAIN_HIGH, RAIN_CLEAR = 0, 1, 2, 3
+
+# Explanation fragments indexed by category
+_TEMP_DESCRIPTIONS = (
+    "Ideal temperature of {:.1f}°F",  # TEMP_IDEAL
+    "A bit cool at {:.1f}°F",         # TEMP_COOL
+    "A bit warm at {:.1f}°F",         # TEMP_WARM
+)
+_RAIN_DESCRIPTIONS = (
+    None,                              # RAIN_NONE
+    "Some chance of rain ({:.0f}%)",   # RAIN_SOME
+    "High chance of rain ({:.0f}%)",   # RAIN_HIGH
+    "Clear skies expected",            # RAIN_CLEAR
+)
+
+@njit(cache=True)
+def _score_numeric(
     temperature: float,
     precipitation_probability: float,
     wind_speed: float,
-    min_temp: float = 60,
-    max_temp: float = 85,
-    avoid_rain: bool = True
-) -> Tuple[float, str]:
+    min_temp: float,
+    max_temp: float,
+    avoid_rain: bool
+) -> Tuple[float, int, int, bool]:
     """
-    Calculate a weather score from 1-10 based on temperature and precipitation
+    Compiled weather score for a single day
     
     Returns:
-        Tuple of (score, explanation)
+        Tuple of (score from 1-10, temperature category, rain category, windy flag)
     """
     score = 5.0  # Start with a neutral score
-    explanation_parts = []
     
-    # Temperature scoring (ideal is between min_temp and max_temp)
+    # Temperature scoring (ideal is between min_temp and max_temp), linear penalty outside
     if min_temp <= temperature <= max_temp:
-        temp_score = 3.0  # Bonus for ideal temperature
-        explanation_parts.append(f"Ideal temperature of {temperature:.1f}°F")
+        score += 3.0
+        temp_category = TEMP_IDEAL
     elif temperature < min_temp:
-        # Linear penalty for cold temperatures
-        temp_diff = min_temp - temperature
-        temp_score = max(0, 3.0 - (temp_diff / 10))
-        explanation_parts.append(f"A bit cool at {temperature:.1f}°F")
-    else:  # temperature > max_temp
-        # Linear penalty for hot temperatures
-        temp_diff = temperature - max_temp
-        temp_score = max(0, 3.0 - (temp_diff / 10))
-        explanation_parts.append(f"A bit warm at {temperature:.1f}°F")
-    
-    score += temp_score
+        score += max(0.0, 3.0 - (min_temp - temperature) / 10)
+        temp_category = TEMP_COOL
+    else:
+        score += max(0.0, 3.0 - (temperature - max_temp) / 10)
+        temp_category = TEMP_WARM
     
     # Precipitation scoring
     if avoid_rain and precipitation_probability > 0.5:
-        rain_penalty = 4.0 * (precipitation_probability - 0.5)
-        score -= rain_penalty
-        explanation_parts.append(f"High chance of rain ({precipitation_probability*100:.0f}%)")
+        score -= 4.0 * (precipitation_probability - 0.5)
+        rain_category = RAIN_HIGH
     elif avoid_rain and precipitation_probability > 0.2:
-        rain_penalty = 2.0 * (precipitation_probability - 0.2)
-        score -= rain_penalty
-        explanation_parts.append(f"Some chance of rain ({precipitation_probability*100:.0f}%)")
+        score -= 2.0 * (precipitation_probability - 0.2)
+        rain_category = RAIN_SOME
     elif precipitation_probability < 0.1:
         score += 1.0
-        explanation_parts.append("Clear skies expected")
+        rain_category = RAIN_CLEAR
+    else:
+        rain_category = RAIN_NONE
     
     # Wind scoring - penalty for high winds
-    if wind_speed > 15:
-        wind_penalty = min(2.0, (wind_speed - 15) / 10)
-        score -= wind_penalty
-        explanation_parts.append(f"Windy conditions ({wind_speed:.1f} mph)")
+    windy = wind_speed > 15
+    if windy:
+        score -= min(2.0, (wind_speed - 15) / 10)
     
     # Ensure score is between 1 and 10
-    score = max(1.0, min(10.0, score))
+    return max(1.0, min(10.0, score)), temp_category, rain_category, windy
+
+@njit(cache=True)
+def _score_kernel(
+    temperatures: np.ndarray,
+    precipitation_probabilities: np.ndarray,
+    wind_speeds: np.ndarray,
+    min_temps: np.ndarray,
+    max_temps: np.ndarray,
+    avoid_rain: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compiled weather scoring of a whole forecast against one or more sets of preferences
+    
+    Returns:
+        Tuple of (scores from 1-10, temperature categories, rain categories, windy flags),
+        each with one row per set of preferences and one column per day
+    """
+    n_prefs = min_temps.shape[0]
+    n_days = temperatures.shape[0]
+    scores = np.empty((n_prefs, n_days))
+    temp_categories = np.empty((n_prefs, n_days), dtype=np.int8)
+    rain_categories = np.empty((n_prefs, n_days), dtype=np.int8)
+    windy = np.empty((n_prefs, n_days), dtype=np.bool_)
+    
+    for u in range(n_prefs):
+        for i in range(n_days):
+            scores[u, i], temp_categories[u, i], rain_categories[u, i], windy[u, i] = _score_numeric(
+                temperatures[i],
+                precipitation_probabilities[i],
+                wind_speeds[i],
+                min_temps[u],
+                max_temps[u],
+                avoid_rain[u]
+            )
+    
+    return scores, temp_categories, rain_categories, windy
+
+def _describe_weather(
+    score: float,
+    temperature: float,
+    precipitation_probability: float,
+    wind_speed: float,
+    temp_category: int,
+    rain_category: int,
+    windy: bool
+) -> str:
+    """Build the explanation for a day scored by the kernel"""
+    explanation_parts = [_TEMP_DESCRIPTIONS[temp_category].format(temperature)]
+    
+    rain_description = _RAIN_DESCRIPTIONS[rain_category]
+    if rain_description is not None:
+        explanation_parts.append(rain_description.format(precipitation_probability * 100))
+    
+    if windy:
+        explanation_parts.append(f"Windy conditions ({wind_speed:.1f} mph)")
     
-    # Create final explanation
     if score >= 8.0:
         quality = "Perfect"
     elif score >= 6.0:
@@ -134,37 +227,184 @@ def calculate_weather_score(
     else:
         quality = "Fair"
     
-    explanation = f"{quality} conditions: " + "; ".join(explanation_parts)
+    return f"{quality} conditions: " + "; ".join(explanation_parts)
+
+def calculate_weather_score(
+    temperature: float,
+    precipitation_probability: float,
+    wind_speed: float,
+    min_temp: float = 60,
+    max_temp: float = 85,
+    avoid_rain: bool = True
+) -> Tuple[float, str]:
+    """
+    Calculate a weather score from 1-10 based on temperature and precipitation
+    
+    Returns:
+        Tuple of (score, explanation)
+    """
+    score, temp_category, rain_category, windy = _score_numeric(
+        float(temperature),
+        float(precipitation_probability),
+        float(wind_speed),
+        float(min_temp),
+        float(max_temp),
+        bool(avoid_rain)
+    )
+    explanation = _describe_weather(
+        score, temperature, precipitation_probability, wind_speed,
+        temp_category, rain_category, windy
+    )
     
     return (score, explanation)
 
+# Weather conditions; a precipitation probability above _CONDITION_THRESHOLDS[i] means _CONDITIONS[i + 1]
+_CONDITION_THRESHOLDS = (0.2, 0.4, 0.7)
+_CONDITIONS = ("Clear", "Partly cloudy", "Chance of rain", "Rainy")
+
 def get_weather_summary(
     temperature: float,
     precipitation_probability: float
 ) -> str:
     """Generate a simple weather summary"""
-    if precipitation_probability > 0.7:
-        condition = "Rainy"
-    elif precipitation_probability > 0.4:
-        condition = "Chance of rain"
-    elif precipitation_probability > 0.2:
-        condition = "Partly cloudy"
-    else:
-        condition = "Clear"
+    condition = _CONDITIONS[bisect_left(_CONDITION_THRESHOLDS, precipitation_probability)]
     
     return f"{condition}, {temperature:.1f}°F"
 
+def _forecast_arrays(weather_data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the columns of a forecast array used for scoring
+    
+    The weather columns are views into the forecast, so nothing is copied.
+    
+    Returns:
+        Tuple of (temperatures, precipitation probabilities, wind speeds, weekend flags)
+    """
+    # Day numbers count from 1970-01-01, a Thursday, so shifting by 3 gives Monday=0 ... Sunday=6
+    weekend = (weather_data["date"].astype(np.int64) + 3) % 7 >= 5
+    
+    return (
+        weather_data["temperature"],
+        weather_data["precipitation_probability"],
+        weather_data["wind_speed"],
+        weekend
+    )
+
+def _resolve_preferences(activity_category: str, user_preferences: Optional[Dict] = None) -> Dict:
+    """Combine the activity category defaults with a user's own weather preferences"""
+    activity_prefs = ACTIVITY_DEFAULTS.get(activity_category, ACTIVITY_DEFAULTS["outdoor"])
+    
+    # Override defaults with the user's preferences into a fresh dict
+    return {
+        **activity_prefs,
+        **{
+            key: value for key, value in (user_preferences or {}).items()
+            if key in activity_prefs and value is not None
+        }
+    }
+
+def score_days_batch(
+    weather_data: np.ndarray,
+    profiles: Sequence[Tuple[str, Optional[Dict]]]
+) -> Tuple[np.ndarray, np.ndarray, Tuple]:
+    """
+    Score one forecast for many users at once
+    
+    The forecast is converted to arrays once and every profile is scored against it
+    in a single kernel call.
+    
+    Args:
+        weather_data: Daily weather forecasts as a FORECAST_DTYPE array
+        profiles: (activity_category, user_preferences) pairs, one per user
+    
+    Returns:
+        Tuple of (weekend flags, total scores including the weekend bonus, kernel results),
+        with one row per profile and one column per day
+    """
+    temperatures, precipitation_probabilities, wind_speeds, weekend = _forecast_arrays(weather_data)
+    
+    min_temps = np.empty(len(profiles), dtype=np.float64)
+    max_temps = np.empty(len(profiles), dtype=np.float64)
+    avoid_rain = np.empty(len(profiles), dtype=np.bool_)
+    for u, (activity_category, user_preferences) in enumerate(profiles):
+        prefs = _resolve_preferences(activity_category, user_preferences)
+        min_temps[u] = prefs["min_temperature"]
+        max_temps[u] = prefs["max_temperature"]
+        avoid_rain[u] = prefs["avoid_rain"]
+    
+    kernel_results = _score_kernel(
+        temperatures, precipitation_probabilities, wind_speeds, min_temps, max_temps, avoid_rain
+    )
+    
+    # Availability bonus for weekends
+    total_scores = kernel_results[0] + np.where(weekend, 0.5, 0.0)
+    
+    return weekend, total_scores, kernel_results
+
+def _build_scored_day(
+    weather_data: np.ndarray,
+    i: int,
+    weekend: np.ndarray,
+    kernel_results: Tuple,
+    user_age_range: str
+) -> ScoredDay:
+    """Build the scored day for forecast day i"""
+    # Convert back to Python values only for the days that are returned
+    day_date = weather_data["date"][i].astype("datetime64[s]").item()
+    temperature = float(weather_data["temperature"][i])
+    precipitation_probability = float(weather_data["precipitation_probability"][i])
+    wind_speed = float(weather_data["wind_speed"][i])
+    scores, temp_categories, rain_categories, windy = kernel_results
+    
+    # Get default time window based on age and weekday/weekend
+    time_start, time_end = get_default_time_window(user_age_range, day_date)
+    
+    score = float(scores[i])
+    explanation = _describe_weather(
+        score,
+        temperature,
+        precipitation_probability,
+        wind_speed,
+        temp_categories[i],
+        rain_categories[i],
+        windy[i]
+    )
+    
+    # Availability bonus for weekends
+    if weekend[i]:
+        score += 0.5
+        availability_note = "Weekend availability"
+    else:
+        availability_note = "Evening availability"
+    
+    weather_summary = get_weather_summary(temperature, precipitation_probability)
+    
+    # Full explanation
+    full_explanation = f"{explanation}. {availability_note}."
+    
+    return ScoredDay(
+        date=day_date,
+        score=score,
+        explanation=full_explanation,
+        weather_summary=weather_summary,
+        temperature=temperature,
+        precipitation_probability=precipitation_probability,
+        wind_speed=wind_speed,
+        preferred_time_start=time_start,
+        preferred_time_end=time_end
+    )
+
 def score_days(
-    weather_data: List[Dict],
+    weather_data: np.ndarray,
     user_age_range: str,
     activity_category: str,
     user_preferences: Optional[Dict] = None
-) -> List[Dict]:
+) -> List[ScoredDay]:
     """
     Score each day based on weather and user preferences
     
     Args:
-        weather_data: List of daily weather forecasts
+        weather_data: Daily weather forecasts as a FORECAST_DTYPE array
         user_age_range: User's age range for default availability
         activity_category: Category of activity ("outdoor", "creative", "social")
         user_preferences: Optional dict of user-specific preferences
@@ -172,76 +412,74 @@ def score_days(
     Returns:
         List of scored day recommendations, sorted by score (descending)
     """
-    # Get default preferences for the activity category
-    activity_prefs = ACTIVITY_DEFAULTS.get(activity_category, ACTIVITY_DEFAULTS["outdoor"])
+    weekend, _, kernel_results = score_days_batch(
+        weather_data, [(activity_category, user_preferences)]
+    )
+    user_results = tuple(result[0] for result in kernel_results)
     
-    # Override defaults with user preferences if provided
-    if user_preferences:
-        for key, value in user_preferences.items():
-            if key in activity_prefs and value is not None:
-                activity_prefs[key] = value
-    
-    # Score each day
-    scored_days = []
-    for day_data in weather_data:
-        day_date = datetime.datetime.fromisoformat(day_data["date"])
-        
-        # Get default time window based on age and weekday/weekend
-        time_start, time_end = get_default_time_window(user_age_range, day_date)
-        
-        # Calculate weather score
-        score, explanation = calculate_weather_score(
-            temperature=day_data["temperature"],
-            precipitation_probability=day_data["precipitation_probability"],
-            wind_speed=day_data.get("wind_speed", 0),
-            min_temp=activity_prefs["min_temperature"],
-            max_temp=activity_prefs["max_temperature"],
-            avoid_rain=activity_prefs["avoid_rain"]
-        )
-        
-        # Availability bonus for weekends
-        if is_weekend(day_date):
-            score += 0.5
-            availability_note = "Weekend availability"
-        else:
-            availability_note = "Evening availability"
-        
-        weather_summary = get_weather_summary(
-            day_data["temperature"],
-            day_data["precipitation_probability"]
-        )
-        
-        # Full explanation
-        full_explanation = f"{explanation}. {availability_note}."
-        
-        scored_days.append({
-            "date": day_date,
-            "score": score,
-            "explanation": full_explanation,
-            "weather_summary": weather_summary,
-            "temperature": day_data["temperature"],
-            "precipitation_probability": day_data["precipitation_probability"],
-            "preferred_time_start": time_start,
-            "preferred_time_end": time_end
-        })
+    scored_days = [
+        _build_scored_day(weather_data, i, weekend, user_results, user_age_range)
+        for i in range(len(weather_data))
+    ]
     
     # Sort by score (descending)
-    scored_days.sort(key=lambda x: x["score"], reverse=True)
+    scored_days.sort(key=attrgetter("score"), reverse=True)
     
     return scored_days
 
+def get_top_recommendations_batch(
+    weather_data: np.ndarray,
+    users: Sequence[Tuple[str, str, Optional[Dict]]],
+    top_n: int = 3
+) -> List[List[ScoredDay]]:
+    """
+    Get the top N recommended days for many users sharing one forecast
+    
+    Only the selected days are turned into ScoredDay records.
+    
+    Args:
+        weather_data: Daily weather forecasts as a FORECAST_DTYPE array
+        users: (user_age_range, activity_category, user_preferences) tuples
+        top_n: Number of top days to return per user
+    
+    Returns:
+        One list of top N recommended days per user, in the order given
+    """
+    if not users:
+        return []
+    
+    weekend, total_scores, kernel_results = score_days_batch(
+        weather_data, [(activity_category, user_preferences) for _, activity_category, user_preferences in users]
+    )
+    
+    recommendations = []
+    for u, (user_age_range, _, _) in enumerate(users):
+        user_scores = total_scores[u].tolist()
+        user_results = tuple(result[u] for result in kernel_results)
+        
+        # Pick the best days without sorting the whole forecast; ties go to the earlier day
+        # just like in score_days
+        top_indices = heapq.nlargest(top_n, range(len(user_scores)), key=user_scores.__getitem__)
+        
+        recommendations.append([
+            _build_scored_day(weather_data, i, weekend, user_results, user_age_range)
+            for i in top_indices
+        ])
+    
+    return recommendations
+
 def get_top_recommendations(
-    weather_data: List[Dict],
+    weather_data: np.ndarray,
     user_age_range: str,
     activity_category: str,
     user_preferences: Optional[Dict] = None,
     top_n: int = 3
-) -> List[Dict]:
+) -> List[ScoredDay]:
     """
     Get the top N recommended days
     
     Args:
-        weather_data: List of daily weather forecasts
+        weather_data: Daily weather forecasts as a FORECAST_DTYPE array
         user_age_range: User's age range
         activity_category: Category of activity
         user_preferences: Optional dict of user-specific preferences
@@ -250,12 +488,6 @@ def get_top_recommendations(
     Returns:
         List of top N recommended days
     """
-    scored_days = score_days(
-        weather_data=weather_data,
-        user_age_range=user_age_range,
-        activity_category=activity_category,
-        user_preferences=user_preferences
-    )
-    
-    # Return top N days
-    return scored_days[:top_n]
+    return get_top_recommendations_batch(
+        weather_data, [(user_age_range, activity_category, user_preferences)], top_n
+    )[0]
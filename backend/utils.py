@@ -1,31 +1,220 @@
+import asyncio
 import httpx
 import logging
+import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import json
-from ics import Calendar, Event
+from functools import lru_cache
+import uuid
+
+import numpy as np
+from jinja2 import Environment, StrictUndefined
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Activity
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def fetch_weather_data(lat: float, lon: float, days: int = 5) -> List[Dict]:
+# Upstream lookups currently in flight, keyed by request type and rounded coordinates
+_pending_lookups: Dict[Tuple, asyncio.Future] = {}
+
+# Shared HTTP client for upstream APIs, created on first use so it binds to the running event loop
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, keeping connections to upstream APIs alive between requests"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _http_client
+
+# Blocking counterpart for callers without an event loop
+_sync_http_client: Optional[httpx.Client] = None
+
+def get_sync_http_client() -> httpx.Client:
+    """Get the shared blocking HTTP client"""
+    global _sync_http_client
+    if _sync_http_client is None or _sync_http_client.is_closed:
+        _sync_http_client = httpx.Client(http2=True, timeout=5.0)
+    return _sync_http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP clients and their pooled connections"""
+    global _http_client, _sync_http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _sync_http_client is not None:
+        _sync_http_client.close()
+        _sync_http_client = None
+
+# Open-Meteo daily forecast endpoint
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Forecasts are structured arrays with one row per day, so scoring reads each field as a column
+FORECAST_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("temperature", np.float64),
+    ("precipitation_probability", np.float64),
+    ("wind_speed", np.float64)
+])
+
+# Recent forecasts held in process, keyed like the lookups above
+WEATHER_TTL = 1800  # Forecasts are reused for 30 minutes
+WEATHER_CACHE_SIZE = 1024
+_weather_cache: Dict[Tuple, Tuple[float, np.ndarray]] = {}
+
+def round_coordinates(lat: float, lon: float) -> Tuple[float, float]:
+    """Round coordinates to a ~1km grid so nearby users share upstream lookups"""
+    return (round(lat, 2), round(lon, 2))
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat: float, lon: float, precision: int = 7) -> str:
+    """
+    Encode coordinates as a geohash string
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        precision: Number of characters (7 is roughly a 150m cell)
+    
+    Returns:
+        Geohash of the cell containing the coordinates
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    
+    while len(chars) < precision:
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even = not even
+        
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    
+    return "".join(chars)
+
+async def _coalesce(key: Tuple, lookup: Callable[[], Awaitable]):
+    """
+    Run lookup() once for all concurrent callers with the same key
+    
+    The first caller starts the lookup; callers arriving while it is in flight
+    await the same future instead of issuing their own request.
+    """
+    future = _pending_lookups.get(key)
+    if future is None:
+        future = asyncio.ensure_future(lookup())
+        _pending_lookups[key] = future
+        future.add_done_callback(lambda _: _pending_lookups.pop(key, None))
+    
+    # Shield so a cancelled caller doesn't cancel the lookup for everyone else
+    return await asyncio.shield(future)
+
+async def fetch_weather_data(lat: float, lon: float, days: int = 5) -> np.ndarray:
     """
     Fetch weather forecast from Open-Meteo API
     
+    Concurrent requests for the same area are coalesced into a single API call,
+    and successful forecasts are reused for WEATHER_TTL seconds.
+    
     Args:
         lat: Latitude
         lon: Longitude
         days: Number of days to forecast (default: 5)
     
     Returns:
-        List of daily weather data
+        Daily weather data as a FORECAST_DTYPE array (empty if the forecast is unavailable)
     """
-    # Open-Meteo API endpoint
-    url = "https://api.open-meteo.com/v1/forecast"
+    lat, lon = round_coordinates(lat, lon)
+    key = ("weather", lat, lon, days)
     
-    # Query parameters
-    params = {
+    cached = _get_cached_forecast(key)
+    if cached is not None:
+        return cached
+    
+    weather_data = await _coalesce(key, lambda: _fetch_weather_data(lat, lon, days))
+    _cache_forecast(key, weather_data)
+    return weather_data
+
+def fetch_weather_data_sync(lat: float, lon: float, days: int = 5) -> np.ndarray:
+    """
+    Fetch weather forecast from Open-Meteo API without an event loop
+    
+    For scripts and batch jobs; request handlers should await fetch_weather_data.
+    Shares the forecast cache with the async version.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        days: Number of days to forecast (default: 5)
+    
+    Returns:
+        Daily weather data as a FORECAST_DTYPE array (empty if the forecast is unavailable)
+    """
+    lat, lon = round_coordinates(lat, lon)
+    key = ("weather", lat, lon, days)
+    
+    cached = _get_cached_forecast(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        response = get_sync_http_client().get(FORECAST_URL, params=_forecast_params(lat, lon, days))
+        response.raise_for_status()
+        weather_data = _parse_forecast(response.json())
+    except Exception as e:
+        logger.error(f"Error fetching weather data: {e}")
+        # Return empty data in case of error
+        return np.empty(0, dtype=FORECAST_DTYPE)
+    
+    _cache_forecast(key, weather_data)
+    return weather_data
+
+def _get_cached_forecast(key: Tuple) -> Optional[np.ndarray]:
+    """Get a forecast from the in-process cache if it hasn't expired"""
+    cached = _weather_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+def _cache_forecast(key: Tuple, weather_data: np.ndarray) -> None:
+    """Keep a forecast in the in-process cache for WEATHER_TTL seconds"""
+    # Only keep real forecasts so a failed request is retried next time
+    if len(weather_data) == 0:
+        return
+    
+    _weather_cache.pop(key, None)
+    if len(_weather_cache) >= WEATHER_CACHE_SIZE:
+        # Entries are kept in insertion order, so the first one expires soonest
+        _weather_cache.pop(next(iter(_weather_cache)))
+    _weather_cache[key] = (time.monotonic() + WEATHER_TTL, weather_data)
+
+def _forecast_params(lat: float, lon: float, days: int) -> Dict:
+    """Query parameters for a daily Open-Meteo forecast"""
+    return {
         "latitude": lat,
         "longitude": lon,
         "daily": "temperature_2m_max,precipitation_probability_max,windspeed_10m_max",
@@ -34,33 +223,60 @@ async def fetch_weather_data(lat: float, lon: float, days: int = 5) -> List[Dict
         "forecast_days": days,
         "timezone": "auto"
     }
+
+def forecast_from_columns(columns: Dict[str, List]) -> np.ndarray:
+    """
+    Build a forecast array from one list of values per FORECAST_DTYPE field
+    
+    Dates may be given as ISO date strings.
+    """
+    weather_data = np.empty(len(columns["date"]), dtype=FORECAST_DTYPE)
+    for field in FORECAST_DTYPE.names:
+        weather_data[field] = columns[field]
+    return weather_data
+
+def forecast_to_columns(weather_data: np.ndarray) -> Dict[str, List]:
+    """Split a forecast array into JSON-serializable lists, one per field"""
+    columns = {field: weather_data[field].tolist() for field in FORECAST_DTYPE.names}
+    columns["date"] = np.datetime_as_string(weather_data["date"]).tolist()
+    return columns
+
+def _parse_forecast(data: Dict) -> np.ndarray:
+    """Turn an Open-Meteo daily forecast response into a forecast array"""
+    daily = data["daily"]
+    weather_data = forecast_from_columns({
+        "date": daily["time"],
+        "temperature": daily["temperature_2m_max"],
+        # Convert percentage to 0-1
+        "precipitation_probability": np.asarray(daily["precipitation_probability_max"], dtype=np.float64) / 100,
+        "wind_speed": daily["windspeed_10m_max"]
+    })
     
+    # Missing values come through as NaN, which would quietly skew every score
+    for field in ("temperature", "precipitation_probability", "wind_speed"):
+        if np.isnan(weather_data[field]).any():
+            raise ValueError(f"Forecast is missing {field} values")
+    
+    return weather_data
+
+async def _fetch_weather_data(lat: float, lon: float, days: int) -> np.ndarray:
+    """Fetch weather forecast from Open-Meteo API without coalescing"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process the API response
-            daily_data = []
-            for i in range(len(data["daily"]["time"])):
-                daily_data.append({
-                    "date": data["daily"]["time"][i],
-                    "temperature": data["daily"]["temperature_2m_max"][i],
-                    "precipitation_probability": data["daily"]["precipitation_probability_max"][i] / 100,  # Convert percentage to 0-1
-                    "wind_speed": data["daily"]["windspeed_10m_max"][i]
-                })
-            
-            return daily_data
+        client = get_http_client()
+        response = await client.get(FORECAST_URL, params=_forecast_params(lat, lon, days))
+        response.raise_for_status()
+        return _parse_forecast(response.json())
     except Exception as e:
         logger.error(f"Error fetching weather data: {e}")
         # Return empty data in case of error
-        return []
+        return np.empty(0, dtype=FORECAST_DTYPE)
 
 async def get_location_name(lat: float, lon: float) -> str:
     """
     Get location name from coordinates using Open-Meteo Geocoding API
     
+    Concurrent requests for the same area are coalesced into a single API call.
+    
     Args:
         lat: Latitude
         lon: Longitude
@@ -68,6 +284,14 @@ async def get_location_name(lat: float, lon: float) -> str:
     Returns:
         Location name (City, Country)
     """
+    lat, lon = round_coordinates(lat, lon)
+    return await _coalesce(
+        ("location", lat, lon),
+        lambda: _get_location_name(lat, lon)
+    )
+
+async def _get_location_name(lat: float, lon: float) -> str:
+    """Get location name from Open-Meteo Geocoding API without coalescing"""
     url = "https://geocoding-api.open-meteo.com/v1/search"
     
     params = {
@@ -78,22 +302,55 @@ async def get_location_name(lat: float, lon: float) -> str:
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("results") and len(data["results"]) > 0:
-                result = data["results"][0]
-                city = result.get("name", "Unknown Location")
-                country = result.get("country", "")
-                return f"{city}, {country}" if country else city
-            
-            return "Unknown Location"
+        client = get_http_client()
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get("results") and len(data["results"]) > 0:
+            result = data["results"][0]
+            city = result.get("name", "Unknown Location")
+            country = result.get("country", "")
+            return f"{city}, {country}" if country else city
+        
+        return "Unknown Location"
     except Exception as e:
         logger.error(f"Error getting location name: {e}")
         return "Unknown Location"
 
+def _escape_ics_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+def _fold_ics_line(line: str) -> str:
+    """Fold a content line so no physical line exceeds 75 octets (RFC 5545 section 3.1)"""
+    if len(line.encode("utf-8")) <= 75:
+        return line
+    
+    parts = []
+    current = ""
+    size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > limit:
+            parts.append(current)
+            current = ""
+            size = 0
+            limit = 74  # Continuation lines start with a space
+        current += char
+        size += char_size
+    parts.append(current)
+    
+    return "\r\n ".join(parts)
+
+@lru_cache(maxsize=512)
 def generate_ics_file(
     activity_name: str,
     date: datetime,
@@ -105,6 +362,10 @@ def generate_ics_file(
     """
     Generate an ICS file content for calendar events
     
+    Results are cached since the content only depends on the arguments. Times are
+    written as floating local times, so the event shows at the chosen hours in the
+    user's own time zone.
+    
     Args:
         activity_name: Name of the activity
         date: Date of the activity
@@ -116,25 +377,59 @@ def generate_ics_file(
     Returns:
         ICS file content as string
     """
-    calendar = Calendar()
-    event = Event()
+    start_datetime = date.replace(hour=time_start, minute=0, second=0, microsecond=0)
+    end_datetime = date.replace(hour=time_end, minute=0, second=0, microsecond=0)
     
-    # Set event details
-    event.name = f"{activity_name}"
+    # The same event always gets the same UID, so downloading it again updates it instead of duplicating it
+    uid = uuid.uuid5(uuid.NAMESPACE_URL, f"{activity_name}|{start_datetime.isoformat()}|{location}")
     
-    # Set start and end times
-    start_datetime = date.replace(hour=time_start, minute=0, second=0)
-    end_datetime = date.replace(hour=time_end, minute=0, second=0)
-    event.begin = start_datetime
-    event.end = end_datetime
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//The Next Good Day//EN",
+        "BEGIN:VEVENT",
+        f"UID:{uid}@nextgoodday.app",
+        f"DTSTAMP:{datetime.utcnow():%Y%m%dT%H%M%SZ}",
+        f"DTSTART:{start_datetime:%Y%m%dT%H%M%S}",
+        f"DTEND:{end_datetime:%Y%m%dT%H%M%S}",
+        f"SUMMARY:{_escape_ics_text(activity_name)}",
+        f"LOCATION:{_escape_ics_text(location)}",
+        f"DESCRIPTION:{_escape_ics_text(description)}",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
     
-    event.location = location
-    event.description = description
-    
-    # Add event to calendar
-    calendar.events.add(event)
-    
-    return str(calendar)
+    return "".join(_fold_ics_line(line) + "\r\n" for line in lines)
+
+# Labels used in invitation emails, indexed by hour of day, weekday and month
+_HOUR_LABELS = tuple(f"{hour % 12 or 12}:00 {'AM' if hour < 12 else 'PM'}" for hour in range(24))
+_DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+# Invitation email body, compiled once at import
+_INVITE_BODY_TEMPLATE = Environment(undefined=StrictUndefined, autoescape=False).from_string("""
+Hi there!
+
+I'm planning to enjoy some time {{ activity }} on {{ day_name }}, {{ date }} and I'd love for you to join me!
+
+Time: {{ time_start }} to {{ time_end }}
+Location: {{ location }}
+Weather forecast: {{ weather_summary }}
+
+The forecast looks {{ score_description }} for this activity!
+
+Let me know if you can make it!
+
+Best,
+{{ user_name }}
+
+--
+Powered by The Next Good Day
+https://nextgoodday.app
+""")
 
 def generate_invite_email(
     user_name: str,
@@ -158,69 +453,98 @@ def generate_invite_email(
     """
     # Format the date
     activity_date = recommendation["date"]
-    day_name = activity_date.strftime("%A")
-    date_str = activity_date.strftime("%B %d")
+    day_name = _DAY_NAMES[activity_date.weekday()]
+    date_str = f"{_MONTH_NAMES[activity_date.month - 1]} {activity_date.day:02d}"
     
     # Format time range
-    time_start = recommendation["preferred_time_start"]
-    time_end = recommendation["preferred_time_end"]
-    time_start_str = f"{time_start}:00"
-    time_end_str = f"{time_end}:00"
-    if time_start >= 12:
-        time_start_str = f"{time_start - 12 if time_start > 12 else 12}:00 PM"
-    else:
-        time_start_str = f"{time_start}:00 AM"
-    
-    if time_end >= 12:
-        time_end_str = f"{time_end - 12 if time_end > 12 else 12}:00 PM"
-    else:
-        time_end_str = f"{time_end}:00 AM"
+    time_start_str = _HOUR_LABELS[recommendation["preferred_time_start"]]
+    time_end_str = _HOUR_LABELS[recommendation["preferred_time_end"]]
     
     # Create email subject and body
     subject = f"Join me for {activity_name} on {day_name}?"
     
-    body = f"""
-Hi there!
-
-I'm planning to enjoy some time {activity_name.lower()} on {day_name}, {date_str} and I'd love for you to join me!
-
-Time: {time_start_str} to {time_end_str}
-Location: {location}
-Weather forecast: {recommendation["weather_summary"]}
-
-The forecast looks {get_score_description(recommendation["score"])} for this activity!
-
-Let me know if you can make it!
-
-Best,
-{user_name}
-
---
-Powered by The Next Good Day
-https://nextgoodday.app
-"""
+    body = _INVITE_BODY_TEMPLATE.render(
+        user_name=user_name,
+        activity=activity_name.lower(),
+        day_name=day_name,
+        date=date_str,
+        time_start=time_start_str,
+        time_end=time_end_str,
+        location=location,
+        weather_summary=recommendation["weather_summary"],
+        score_description=get_score_description(recommendation["score"])
+    )
     
     return {
         "subject": subject,
         "body": body.strip()
     }
 
+# Score descriptions; a score at or above _SCORE_THRESHOLDS[i] earns _SCORE_DESCRIPTIONS[i + 1]
+_SCORE_THRESHOLDS = (4.0, 5.5, 7.0, 8.5)
+_SCORE_DESCRIPTIONS = ("decent", "good", "very good", "excellent", "perfect")
+
 def get_score_description(score: float) -> str:
     """Get a descriptive text based on the score"""
-    if score >= 8.5:
-        return "perfect"
-    elif score >= 7.0:
-        return "excellent"
-    elif score >= 5.5:
-        return "very good"
-    elif score >= 4.0:
-        return "good"
-    else:
-        return "decent"
+    return _SCORE_DESCRIPTIONS[bisect_right(_SCORE_THRESHOLDS, score)]
+
+# Bounds of the age ranges offered at sign-up
+_AGE_BOUNDS = {
+    "18-24": (18, 24),
+    "25-34": (25, 34),
+    "35-44": (35, 44),
+    "45-54": (45, 54),
+    "55+": (55, 100),
+}
+
+def parse_age_range(age_range: str) -> Tuple[int, int]:
+    """
+    Get the bounds of an age range
+    
+    Args:
+        age_range: User's age range (e.g., "18-24" or "55+")
+    
+    Returns:
+        Tuple of (min_age, max_age), defaulting to (18, 65) for unknown ranges
+    """
+    return _AGE_BOUNDS.get(age_range, (18, 65))
+
+async def query_activities(
+    session: AsyncSession,
+    min_user_age: int,
+    max_user_age: int,
+    gender: Optional[str] = None
+) -> List[Activity]:
+    """
+    Load the activities that suit a user's demographics, filtering in the database
+    
+    Applies the same rules as filter_activities_by_demographics.
+    
+    Args:
+        session: Database session
+        min_user_age: Lower bound of the user's age range
+        max_user_age: Upper bound of the user's age range
+        gender: User's gender (optional)
+    
+    Returns:
+        Matching activities
+    """
+    stmt = select(Activity).where(
+        or_(Activity.min_age.is_(None), Activity.min_age <= min_user_age),
+        or_(Activity.max_age.is_(None), Activity.max_age >= max_user_age)
+    )
+    if gender:
+        stmt = stmt.where(
+            or_(Activity.gender_preference.is_(None), Activity.gender_preference == gender)
+        )
+    
+    return list((await session.scalars(stmt)).all())
 
 def filter_activities_by_demographics(activities: List[Dict], age_range: str, gender: Optional[str] = None) -> List[Dict]:
     """
-    Filter activities based on user demographics
+    Filter already loaded activities based on user demographics
+    
+    Use query_activities to filter in the database instead.
     
     Args:
         activities: List of activity dicts
@@ -230,15 +554,7 @@ def filter_activities_by_demographics(activities: List[Dict], age_range: str, ge
     Returns:
         Filtered list of activities
     """
-    # Extract min and max age from age range
-    age_parts = age_range.replace("+", "-100").split("-")
-    try:
-        min_user_age = int(age_parts[0])
-        max_user_age = int(age_parts[1]) if len(age_parts) > 1 else 100
-    except (ValueError, IndexError):
-        # Default in case of parsing error
-        min_user_age = 18
-        max_user_age = 65
+    min_user_age, max_user_age = parse_age_range(age_range)
     
     filtered = []
     for activity in activities:
@@ -99,7 +99,26 @@ export async function createInviteEmail(recommendationId, recipientEmail) {
  * Get a calendar file for a recommendation
  */
 export async function getCalendarFile(recommendationId) {
-  return await fetchApi(`/recommendations/${recommendationId}/calendar`);
+  try {
+    const response = await fetch(`${API_BASE_URL}/recommendations/${recommendationId}/calendar`);
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(errorText || `API error: ${response.status}`);
+    }
+
+    // The API returns the .ics file itself; the filename is in Content-Disposition
+    const disposition = response.headers.get('Content-Disposition') || '';
+    const match = disposition.match(/filename="([^"]+)"/);
+
+    return {
+      ics_content: await response.text(),
+      filename: match ? match[1] : 'event.ics'
+    };
+  } catch (error) {
+    console.error('API request failed:', error);
+    throw error;
+  }
 }
 
 /**
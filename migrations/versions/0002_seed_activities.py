@@ -0,0 +1,208 @@
+"""Seed the activity catalog
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 21:52:10.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INITIAL_ACTIVITIES = (
+    {
+        "name": "Hiking",
+        "description": "Explore nature trails and enjoy the outdoors",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 50,
+            "max_temperature": 85,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Photography",
+        "description": "Capture beautiful moments and scenes",
+        "category": "creative",
+        "weather_preferences": {
+            "min_temperature": 45,
+            "max_temperature": 90,
+            "avoid_rain": False,
+            "avoid_snow": False
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Cycling",
+        "description": "Go for a bike ride",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 55,
+            "max_temperature": 85,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Picnic",
+        "description": "Enjoy a meal outdoors",
+        "category": "social",
+        "weather_preferences": {
+            "min_temperature": 65,
+            "max_temperature": 85,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Painting",
+        "description": "Express yourself through art",
+        "category": "creative",
+        "weather_preferences": {
+            "min_temperature": 50,
+            "max_temperature": 90,
+            "avoid_rain": False,
+            "avoid_snow": False
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Reading",
+        "description": "Enjoy a good book",
+        "category": "creative",
+        "weather_preferences": {
+            "min_temperature": 50,
+            "max_temperature": 90,
+            "avoid_rain": False,
+            "avoid_snow": False
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Running",
+        "description": "Go for a jog or run",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 45,
+            "max_temperature": 80,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Beach Day",
+        "description": "Relax by the water",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 75,
+            "max_temperature": 95,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Coffee Shop Work",
+        "description": "Productive time at a local coffee shop",
+        "category": "creative",
+        "weather_preferences": {
+            "min_temperature": 40,
+            "max_temperature": 100,
+            "avoid_rain": False,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Gardening",
+        "description": "Tend to plants and garden",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 55,
+            "max_temperature": 85,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    },
+    {
+        "name": "Yoga",
+        "description": "Practice yoga outdoors",
+        "category": "outdoor",
+        "weather_preferences": {
+            "min_temperature": 60,
+            "max_temperature": 85,
+            "avoid_rain": True,
+            "avoid_snow": True
+        },
+        "min_age": None,
+        "max_age": None,
+        "gender_preference": None
+    }
+)
+
+activities = sa.table(
+    'activities',
+    sa.column('name', sa.String),
+    sa.column('description', sa.Text),
+    sa.column('category', sa.String),
+    sa.column('weather_preferences', sa.JSON),
+    sa.column('min_age', sa.Integer),
+    sa.column('max_age', sa.Integer),
+    sa.column('gender_preference', sa.String),
+)
+
+
+def upgrade() -> None:
+    # Activity names identify catalog entries, so seeding can skip existing ones
+    op.create_index('ix_activities_name', 'activities', ['name'], unique=True)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    op.execute(
+        insert(activities)
+        .values(list(INITIAL_ACTIVITIES))
+        .on_conflict_do_nothing(index_elements=['name'])
+    )
+
+
+def downgrade() -> None:
+    # Seeded activities are left in place since user activities may reference them
+    op.drop_index('ix_activities_name', table_name='activities')
@@ -0,0 +1,28 @@
+"""Index user activity and recommendation lookups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 21:48:57.756118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_ua_user_activity', 'user_activities', ['user_id', 'activity_id'], unique=False)
+    op.create_index('ix_recommendations_user_activity_id', 'recommendations', ['user_activity_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recommendations_user_activity_id', table_name='recommendations')
+    op.drop_index('ix_ua_user_activity', table_name='user_activities')
@@ -0,0 +1,31 @@
+"""Index recommendations by date and messages by sender
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 21:58:25.566456
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The composite index also serves plain user_activity_id lookups, so it replaces the single-column one
+    op.create_index('ix_recs_ua_date', 'recommendations', ['user_activity_id', 'date'], unique=False)
+    op.drop_index('ix_recommendations_user_activity_id', table_name='recommendations')
+    op.create_index('ix_msg_user_created', 'messages', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_msg_user_created', table_name='messages')
+    op.create_index('ix_recommendations_user_activity_id', 'recommendations', ['user_activity_id'], unique=False)
+    op.drop_index('ix_recs_ua_date', table_name='recommendations')
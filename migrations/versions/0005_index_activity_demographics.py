@@ -0,0 +1,26 @@
+"""Index activity demographics
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 22:03:12.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_act_demo', 'activities', ['min_age', 'max_age', 'gender_preference'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_act_demo', table_name='activities')
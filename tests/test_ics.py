@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from backend.utils import _escape_ics_text, _fold_ics_line, generate_ics_file
+
+def _unfold(content: str) -> str:
+    """Undo line folding (RFC 5545 section 3.1)"""
+    return content.replace("\r\n ", "")
+
+def _property(content: str, name: str) -> str:
+    """Value of the first property with the given name"""
+    for line in _unfold(content).split("\r\n"):
+        if line.startswith(f"{name}:"):
+            return line[len(name) + 1:]
+    raise AssertionError(f"{name} not found")
+
+def _event(**overrides) -> str:
+    arguments = {
+        "activity_name": "Hiking",
+        "date": datetime(2026, 10, 15),
+        "time_start": 9,
+        "time_end": 17,
+        "location": "Springfield, USA",
+        "description": "Weather: Clear skies, 72.0°F",
+    }
+    arguments.update(overrides)
+    return generate_ics_file(**arguments)
+
+def test_escape_ics_text():
+    assert _escape_ics_text("a\\b;c,d\ne\r\nf") == "a\\\\b\\;c\\,d\\ne\\nf"
+
+def test_fold_ics_line_keeps_lines_within_75_octets():
+    line = "DESCRIPTION:" + "Météo ☀️ 晴れ, " * 20
+
+    folded = _fold_ics_line(line)
+
+    physical_lines = folded.split("\r\n")
+    assert len(physical_lines) > 1
+    assert all(len(physical_line.encode("utf-8")) <= 75 for physical_line in physical_lines)
+    assert all(physical_line.startswith(" ") for physical_line in physical_lines[1:])
+    assert _unfold(folded) == line
+
+def test_fold_ics_line_leaves_short_lines_alone():
+    assert _fold_ics_line("SUMMARY:Hiking") == "SUMMARY:Hiking"
+
+def test_generate_ics_file_folds_and_escapes_long_descriptions():
+    description = "Weather: Rain; bring a jacket, boots\n" + "Très humide ☔ " * 15
+
+    content = _event(description=description)
+
+    assert all(len(line.encode("utf-8")) <= 75 for line in content.split("\r\n"))
+    assert _property(content, "DESCRIPTION") == _escape_ics_text(description)
+
+def test_generate_ics_file_uses_floating_local_times():
+    content = _event(time_start=0, time_end=23)
+
+    assert _property(content, "DTSTART") == "20261015T000000"
+    assert _property(content, "DTEND") == "20261015T230000"
+
+def test_generate_ics_file_uid_is_stable():
+    first = _property(_event(), "UID")
+    generate_ics_file.cache_clear()
+    second = _property(_event(), "UID")
+
+    assert first == second
+    assert first.endswith("@nextgoodday.app")
+    assert _property(_event(activity_name="Picnic"), "UID") != first
@@ -0,0 +1,37 @@
+import pytest
+
+from backend.scoring import calculate_weather_score, score_days
+from backend.utils import forecast_from_columns
+
+# Days whose score lands exactly on an explanation threshold; any reordering of the
+# score arithmetic by the compiler pushes them just below it and into the next label down
+THRESHOLD_DAYS = [
+    # (temperature, precipitation probability, wind speed, expected score, expected label)
+    (34, 0.4, 25, 4.0, "Good conditions"),
+    (44, 0.4, 10, 6.0, "Great conditions"),
+    (92, 0.05, 18, 8.0, "Perfect conditions"),
+]
+
+@pytest.mark.parametrize("temperature, precipitation_probability, wind_speed, expected_score, label", THRESHOLD_DAYS)
+def test_calculate_weather_score_at_thresholds(
+    temperature, precipitation_probability, wind_speed, expected_score, label
+):
+    score, explanation = calculate_weather_score(temperature, precipitation_probability, wind_speed)
+
+    assert score == expected_score
+    assert explanation.startswith(label)
+
+def test_score_days_at_thresholds():
+    weather_data = forecast_from_columns({
+        # Weekdays, so no weekend bonus is added
+        "date": ["2026-10-13", "2026-10-14", "2026-10-15"],
+        "temperature": [day[0] for day in THRESHOLD_DAYS],
+        "precipitation_probability": [day[1] for day in THRESHOLD_DAYS],
+        "wind_speed": [day[2] for day in THRESHOLD_DAYS],
+    })
+
+    scored_days = sorted(score_days(weather_data, "25-34", "outdoor"), key=lambda day: day.date)
+
+    for scored_day, (_, _, _, expected_score, label) in zip(scored_days, THRESHOLD_DAYS):
+        assert scored_day.score == expected_score
+        assert scored_day.explanation.startswith(label)